@@ -1,7 +1,21 @@
 import bpy
-import random
-from math import radians
-from mathutils import Vector
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from math import tau
+from mathutils import Matrix, Vector
+from mathutils.bvhtree import BVHTree
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+# Blender's Text Editor sets __file__ to "<file>.blend/<text>", where numba cannot cache
+njit_cache = os.path.isfile(__file__)
 
 terrain_name = "plane"
 no_trees_vgroup = "NoTrees"
@@ -14,6 +28,9 @@ tree_collection = "Generated_Trees"
 bush_collection = "Generated_Bushes"
 flower_collection = "Generated_Flowers"
 
+max_consecutive_fails = 300
+sample_chunk_factor = 4
+
 def get_or_create_collection(name):
     col = bpy.data.collections.get(name)
     if col is None:
@@ -27,123 +44,407 @@ def get_collection(name):
 def clear_collection(col):
     if col is None:
         return
-    for obj in list(col.objects):
-        bpy.data.objects.remove(obj, do_unlink=True)
+    instance_cols = {obj.instance_collection for obj in col.objects if obj.instance_collection}
+    bpy.data.batch_remove(ids=list(col.objects))
+
+    # drop the <name>_instance collections so the source objects are unlinked from them again
+    for instance_col in instance_cols:
+        if instance_col.users == 0:
+            bpy.data.collections.remove(instance_col)
+
+def build_heightfield(mesh, to_local):
+    down = to_local.to_3x3() @ Vector((0.0, 0.0, -1.0))
+    if abs(down.x) > 1e-6 or abs(down.y) > 1e-6 or down.z >= 0.0:
+        return None
+
+    n_verts = len(mesh.vertices)
+    n_polys = len(mesh.polygons)
+    if n_polys == 0:
+        return None
+
+    co = np.empty(n_verts * 3, dtype=np.float64)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3)
+
+    xs = np.unique(np.round(co[:, 0], 5))
+    ys = np.unique(np.round(co[:, 1], 5))
+    nx = len(xs) - 1
+    ny = len(ys) - 1
+    if nx < 1 or ny < 1 or nx * ny != n_polys or (nx + 1) * (ny + 1) != n_verts:
+        return None
+
+    x0 = xs[0]
+    y0 = ys[0]
+    dx = (xs[-1] - x0) / nx
+    dy = (ys[-1] - y0) / ny
+    if not (np.allclose(np.diff(xs), dx) and np.allclose(np.diff(ys), dy)):
+        return None
+
+    vx = np.rint((co[:, 0] - x0) / dx).astype(np.int64)
+    vy = np.rint((co[:, 1] - y0) / dy).astype(np.int64)
+    heights = np.full((ny + 1, nx + 1), np.nan)
+    heights[vy, vx] = co[:, 2]
+    if np.isnan(heights).any():
+        return None
+
+    centers = np.empty(n_polys * 3, dtype=np.float64)
+    mesh.polygons.foreach_get("center", centers)
+    centers = centers.reshape(-1, 3)
+    cx = np.floor((centers[:, 0] - x0) / dx).astype(np.int64)
+    cy = np.floor((centers[:, 1] - y0) / dy).astype(np.int64)
+    if cx.min() < 0 or cy.min() < 0 or cx.max() >= nx or cy.max() >= ny:
+        return None
+
+    cell_to_face = np.full(nx * ny, -1, dtype=np.int64)
+    cell_to_face[cy * nx + cx] = np.arange(n_polys)
+    if (cell_to_face < 0).any():
+        return None
+
+    loop_start = np.empty(n_polys, dtype=np.int32)
+    loop_total = np.empty(n_polys, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", loop_start)
+    mesh.polygons.foreach_get("loop_total", loop_total)
+    if (loop_total != 4).any():
+        return None
+
+    loop_vi = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vi)
+    first = loop_vi[loop_start]
+
+    cell_diag = np.empty(nx * ny, dtype=bool)
+    cell_diag[cy * nx + cx] = (vx[first] - cx) == (vy[first] - cy)
+
+    return x0, y0, dx, dy, nx, ny, heights, cell_to_face, cell_diag
+
+def sample_heightfield(heightfield, to_world, to_local, xy, z_start):
+    x0, y0, dx, dy, nx, ny, heights, cell_to_face, cell_diag = heightfield
+
+    m = np.array(to_local)
+    lx = m[0, 0] * xy[:, 0] + m[0, 1] * xy[:, 1] + m[0, 2] * z_start + m[0, 3]
+    ly = m[1, 0] * xy[:, 0] + m[1, 1] * xy[:, 1] + m[1, 2] * z_start + m[1, 3]
+    lz = m[2, 0] * xy[:, 0] + m[2, 1] * xy[:, 1] + m[2, 2] * z_start + m[2, 3]
+
+    gx = (lx - x0) / dx
+    gy = (ly - y0) / dy
+    inside = (gx >= 0.0) & (gy >= 0.0) & (gx <= nx) & (gy <= ny)
+
+    ix = np.clip(gx.astype(np.int64), 0, nx - 1)
+    iy = np.clip(gy.astype(np.int64), 0, ny - 1)
+    fx = gx - ix
+    fy = gy - iy
+
+    z00 = heights[iy, ix]
+    z10 = heights[iy, ix + 1]
+    z01 = heights[iy + 1, ix]
+    z11 = heights[iy + 1, ix + 1]
+
+    z_diag = np.where(
+        fx >= fy,
+        z00 + fx * (z10 - z00) + fy * (z11 - z10),
+        z00 + fy * (z01 - z00) + fx * (z11 - z01)
+    )
+    z_anti = np.where(
+        fx + fy <= 1.0,
+        z00 + fx * (z10 - z00) + fy * (z01 - z00),
+        z11 + (1.0 - fx) * (z01 - z11) + (1.0 - fy) * (z10 - z11)
+    )
+    z = np.where(cell_diag[iy * nx + ix], z_diag, z_anti)
 
-def raycast_to_terrain(terrain, x, y, z_start):
-    depsgraph = bpy.context.evaluated_depsgraph_get()
-    origin = Vector((x, y, z_start))
-    direction = Vector((0.0, 0.0, -1.0))
+    valid = inside & (z <= lz)
+    face_index = np.where(valid, cell_to_face[iy * nx + ix], -1)
 
-    for _ in range(20):
-        hit, location, normal, face_index, hit_obj, matrix = bpy.context.scene.ray_cast(
-            depsgraph, origin, direction
-        )
+    local = np.column_stack((lx, ly, z, np.ones_like(z)))
+    xyz = (local @ np.array(to_world).T)[:, :3]
+    return xyz, face_index
+
+def raycast_to_terrain(bvh, to_world, to_local, direction, x, y, z_start):
+    origin = to_local @ Vector((x, y, z_start))
 
-        if not hit:
-            return None, None
+    location, normal, face_index, distance = bvh.ray_cast(origin, direction)
 
-        if hit_obj == terrain:
-            return location, face_index
+    if location is None:
+        return None, None
 
-        origin = location + direction * 0.01
+    return to_world @ location, face_index
 
-    return None, None
+def vgroup_face_weights_avg(terrain, mesh, vgroup_name):
+    n_polys = len(mesh.polygons)
+    face_weights = np.zeros(n_polys, dtype=np.float32)
 
-def vgroup_weight_at_face_avg(terrain, vgroup_name, face_index):
     vg = terrain.vertex_groups.get(vgroup_name)
-    if vg is None:
-        return 0.0
+    if vg is None or n_polys == 0:
+        return face_weights
+
+    vweight = np.zeros(len(mesh.vertices), dtype=np.float32)
+    for v in mesh.vertices:
+        for g in v.groups:
+            if g.group == vg.index:
+                vweight[v.index] = g.weight
+                break
+
+    loop_start = np.empty(n_polys, dtype=np.int32)
+    loop_total = np.empty(n_polys, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", loop_start)
+    mesh.polygons.foreach_get("loop_total", loop_total)
+
+    loop_vi = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vi)
+
+    face_weights[:] = np.add.reduceat(vweight[loop_vi], loop_start) / loop_total
+    return face_weights
+
+def terrain_hits(bvh, heightfield, to_world, to_local, xy, z_start):
+    if heightfield is not None:
+        return sample_heightfield(heightfield, to_world, to_local, xy, z_start)
+
+    xyz = np.zeros((len(xy), 3))
+    face_index = np.full(len(xy), -1, dtype=np.int64)
+
+    raycast = raycast_to_terrain
+    direction = to_local.to_3x3() @ Vector((0.0, 0.0, -1.0))
+
+    for i, (x, y) in enumerate(xy.tolist()):
+        loc, face = raycast(bvh, to_world, to_local, direction, x, y, z_start)
+        if loc is not None:
+            xyz[i] = loc
+            face_index[i] = face
+
+    return xyz, face_index
+
+@njit(cache=njit_cache, nogil=True)
+def poisson_sample(
+    xyz,
+    valid,
+    offset,
+    area,
+    cell,
+    nx,
+    min_distance,
+    max_fails,
+    head,
+    next_in_cell,
+    placed_xyz,
+    accepted,
+    counters
+):
+    count = placed_xyz.shape[0]
+    placed = counters[0]
+    fails_since_accept = counters[1]
+    min_distance_sq = min_distance * min_distance
+    used = 0
+
+    for t in range(xyz.shape[0]):
+        if placed >= count or fails_since_accept >= max_fails:
+            break
+        used = t + 1
+
+        if not valid[t]:
+            continue
 
-    poly = terrain.data.polygons[face_index]
-    weights = []
+        x = xyz[t, 0]
+        y = xyz[t, 1]
+        z = xyz[t, 2]
+        ix = min(max(int((x + area) / cell), 0), nx - 1)
+        iy = min(max(int((y + area) / cell), 0), nx - 1)
 
-    for vid in poly.vertices:
-        try:
-            w = vg.weight(vid)
-        except RuntimeError:
-            w = 0.0
-        weights.append(w)
+        if min_distance > 0.0:
+            too_close = False
+            for gy in range(max(iy - 1, 0), min(iy + 2, nx)):
+                for gx in range(max(ix - 1, 0), min(ix + 2, nx)):
+                    j = head[gy * nx + gx]
+                    while j >= 0:
+                        dx = x - placed_xyz[j, 0]
+                        dy = y - placed_xyz[j, 1]
+                        dz = z - placed_xyz[j, 2]
+                        if dx * dx + dy * dy + dz * dz < min_distance_sq:
+                            too_close = True
+                            break
+                        j = next_in_cell[j]
+                    if too_close:
+                        break
+                if too_close:
+                    break
+            if too_close:
+                fails_since_accept += 1
+                continue
+
+            c = iy * nx + ix
+            next_in_cell[placed] = head[c]
+            head[c] = placed
 
-    return sum(weights) / len(weights) if weights else 0.0
+        placed_xyz[placed, 0] = x
+        placed_xyz[placed, 1] = y
+        placed_xyz[placed, 2] = z
+        accepted[placed] = offset + t
+        placed += 1
+        fails_since_accept = 0
+
+    counters[0] = placed
+    counters[1] = fails_since_accept
+    return used
 
 def copy_with_children(src_obj, target_collection):
-    new_obj = src_obj.copy()
-    target_collection.objects.link(new_obj)
+    mapping = {}
+    stack = [src_obj]
+
+    while stack:
+        obj = stack.pop()
+        new_obj = obj.copy()
+        target_collection.objects.link(new_obj)
+        mapping[obj] = new_obj
+        stack.extend(obj.children)
+
+    for obj, new_obj in mapping.items():
+        if obj is src_obj:
+            continue
+        new_obj.parent = mapping[obj.parent]
+        new_obj.matrix_parent_inverse = obj.matrix_parent_inverse
+        new_obj.matrix_basis = obj.matrix_basis
 
-    for child in src_obj.children:
-        new_child = copy_with_children(child, target_collection)
-        new_child.parent = new_obj
-        new_child.matrix_parent_inverse = child.matrix_parent_inverse.copy()
-        new_child.matrix_basis = child.matrix_basis.copy()
+    return mapping[src_obj]
 
-    return new_obj
+def get_instance_collection(src_obj):
+    name = f"{src_obj.name}_instance"
+    col = bpy.data.collections.get(name)
+    if col is None:
+        col = bpy.data.collections.new(name)
 
-def scatter_on_terrain(
-    source_obj_name,
-    target_collection_name,
-    count,
-    area,
-    z_start,
-    min_scale,
-    max_scale,
-    use_vgroup,
-    path_threshold,
-    min_distance
-):
+    for obj in [src_obj, *src_obj.children_recursive]:
+        if col.objects.get(obj.name) is None:
+            col.objects.link(obj)
+
+    col.instance_offset = src_obj.matrix_world.translation
+    return col
+
+def create_instance(instance_col, target_collection):
+    empty = bpy.data.objects.new(instance_col.name, None)
+    empty.instance_type = "COLLECTION"
+    empty.instance_collection = instance_col
+    target_collection.objects.link(empty)
+    return empty
+
+def get_terrain():
     terrain = bpy.data.objects.get(terrain_name)
-    src = bpy.data.objects.get(source_obj_name)
 
     if terrain is None:
         raise RuntimeError("Terrain not found")
     if terrain.type != "MESH":
         raise RuntimeError("Terrain must be mesh")
-    if src is None:
-        raise RuntimeError(f"Source object '{source_obj_name}' not found")
-    if max_scale < min_scale:
-        raise RuntimeError("Invalid scale range")
 
-    col = get_or_create_collection(target_collection_name)
-    clear_collection(col)
+    return terrain
 
-    placed_positions = []
-    placed = 0
-    tries = 0
-    max_tries = count * 40
+def prepare_terrain(terrain, use_vgroup):
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    to_world = terrain.matrix_world.copy()
+    to_local = to_world.inverted()
 
-    while placed < count and tries < max_tries:
-        tries += 1
+    eval_obj = terrain.evaluated_get(depsgraph)
+    eval_mesh = eval_obj.to_mesh()
+    try:
+        heightfield = build_heightfield(eval_mesh, to_local)
 
-        x = random.uniform(-area, area)
-        y = random.uniform(-area, area)
+        face_weights = None
+        if use_vgroup:
+            face_weights = vgroup_face_weights_avg(terrain, eval_mesh, no_trees_vgroup)
+    finally:
+        eval_obj.to_mesh_clear()
 
-        loc, face_index = raycast_to_terrain(terrain, x, y, z_start)
-        if loc is None:
-            continue
+    # the heightfield answers every lookup, only irregular terrains need the BVH
+    bvh = None
+    if heightfield is None:
+        bvh = BVHTree.FromObject(terrain, depsgraph)
 
-        if use_vgroup:
-            w = vgroup_weight_at_face_avg(terrain, no_trees_vgroup, face_index)
-            if w > path_threshold:
-                continue
+    return bvh, heightfield, to_world, to_local, face_weights
 
-        if min_distance > 0.0:
-            loc_vec = Vector(loc)
-            if any((loc_vec - p).length < min_distance for p in placed_positions):
-                continue
-            placed_positions.append(loc_vec)
+def get_sources(source_obj_names):
+    sources = []
+    for name in source_obj_names:
+        obj = bpy.data.objects.get(name)
+        if obj is None:
+            raise RuntimeError(f"Source object '{name}' not found")
+        sources.append(obj)
+    return sources
+
+def sample_positions(
+    terrain_data,
+    count,
+    area,
+    z_start,
+    min_scale,
+    max_scale,
+    path_threshold,
+    min_distance,
+    n_sources
+):
+    bvh, heightfield, to_world, to_local, face_weights = terrain_data
+    max_tries = count * 40
+    chunk_size = count * sample_chunk_factor
+
+    rng = np.random.default_rng()
+    xy = rng.uniform(-area, area, (max_tries, 2))
+    rots = rng.uniform(0.0, tau, max_tries)
+    scales = rng.uniform(min_scale, max_scale, max_tries)
+    choices = rng.integers(n_sources, size=max_tries)
+
+    cell = max(min_distance, 2.0 * area / 256.0)
+    nx = int(2.0 * area / cell) + 1
+    head = np.full(nx * nx, -1, dtype=np.int64)
+    next_in_cell = np.full(count, -1, dtype=np.int64)
+    placed_xyz = np.empty((count, 3))
+    accepted = np.empty(count, dtype=np.int64)
+    counters = np.zeros(2, dtype=np.int64)
+    tries = 0
 
-        new_obj = copy_with_children(src, col)
-        new_obj.location = loc
-        new_obj.rotation_euler[2] = radians(random.uniform(0, 360))
+    for start in range(0, max_tries, chunk_size):
+        xyz, face_index = terrain_hits(
+            bvh, heightfield, to_world, to_local, xy[start:start + chunk_size], z_start
+        )
+        valid = face_index >= 0
+        if face_weights is not None and len(face_weights):
+            valid &= face_weights[np.maximum(face_index, 0)] <= path_threshold
 
-        s = random.uniform(min_scale, max_scale)
-        new_obj.scale = (s, s, s)
+        tries = start + poisson_sample(
+            xyz, valid, start, area, cell, nx, min_distance, max_consecutive_fails,
+            head, next_in_cell, placed_xyz, accepted, counters
+        )
+        if counters[0] >= count or counters[1] >= max_consecutive_fails:
+            break
 
-        placed += 1
+    placed = counters[0]
+    accepted = accepted[:placed]
+    return placed_xyz[:placed], rots[accepted], scales[accepted], choices[accepted], tries
 
-    return placed, tries
+def place_objects(sources, target_collection_name, samples, use_instances):
+    locs, rots, scales, choices, tries = samples
 
-def scatter_flowers_on_terrain(
+    col = get_or_create_collection(target_collection_name)
+    clear_collection(col)
+
+    if use_instances:
+        instance_cols = {obj: get_instance_collection(obj) for obj in sources}
+        # the instance draws the source with its own transform, cancel it out so
+        # the root ends up where copy mode would put it
+        instance_corr = {
+            obj: obj.matrix_world.inverted() @ Matrix.Translation(instance_cols[obj].instance_offset)
+            for obj in sources
+        }
+
+    for loc, rot_z, s, k in zip(locs.tolist(), rots.tolist(), scales.tolist(), choices.tolist()):
+        src = sources[k]
+        if use_instances:
+            new_obj = create_instance(instance_cols[src], col)
+            rot = src.rotation_euler.copy()
+            rot[2] = rot_z
+            new_obj.matrix_world = Matrix.LocRotScale(loc, rot, (s, s, s)) @ instance_corr[src]
+        else:
+            new_obj = copy_with_children(src, col)
+            new_obj.location = loc
+            new_obj.rotation_euler[2] = rot_z
+            new_obj.scale = (s, s, s)
+
+    return len(locs), tries
+
+def scatter_sources_on_terrain(
     source_obj_names,
     target_collection_name,
     count,
@@ -153,65 +454,122 @@ def scatter_flowers_on_terrain(
     max_scale,
     use_vgroup,
     path_threshold,
-    min_distance
+    min_distance,
+    use_instances=False
 ):
-    terrain = bpy.data.objects.get(terrain_name)
+    terrain = get_terrain()
+    sources = get_sources(source_obj_names)
 
-    if terrain is None:
-        raise RuntimeError("Terrain not found")
-    if terrain.type != "MESH":
-        raise RuntimeError("Terrain must be mesh")
     if max_scale < min_scale:
         raise RuntimeError("Invalid scale range")
 
-    sources = []
-    for name in source_obj_names:
-        obj = bpy.data.objects.get(name)
-        if obj is None:
-            raise RuntimeError(f"Source object '{name}' not found")
-        sources.append(obj)
-
-    col = get_or_create_collection(target_collection_name)
-    clear_collection(col)
+    terrain_data = prepare_terrain(terrain, use_vgroup)
+    samples = sample_positions(
+        terrain_data, count, area, z_start, min_scale, max_scale,
+        path_threshold, min_distance, len(sources)
+    )
+    placed, tries = place_objects(sources, target_collection_name, samples, use_instances)
 
-    placed_positions = []
-    placed = 0
-    tries = 0
-    max_tries = count * 40
+    bpy.context.view_layer.update()
 
-    while placed < count and tries < max_tries:
-        tries += 1
+    return placed, tries
 
-        x = random.uniform(-area, area)
-        y = random.uniform(-area, area)
+def scatter_on_terrain(
+    source_obj_name,
+    target_collection_name,
+    count,
+    area,
+    z_start,
+    min_scale,
+    max_scale,
+    use_vgroup,
+    path_threshold,
+    min_distance,
+    use_instances=False
+):
+    return scatter_sources_on_terrain(
+        [source_obj_name],
+        target_collection_name,
+        count,
+        area,
+        z_start,
+        min_scale,
+        max_scale,
+        use_vgroup,
+        path_threshold,
+        min_distance,
+        use_instances
+    )
 
-        loc, face_index = raycast_to_terrain(terrain, x, y, z_start)
-        if loc is None:
-            continue
+def scatter_flowers_on_terrain(
+    source_obj_names,
+    target_collection_name,
+    count,
+    area,
+    z_start,
+    min_scale,
+    max_scale,
+    use_vgroup,
+    path_threshold,
+    min_distance,
+    use_instances=False
+):
+    return scatter_sources_on_terrain(
+        source_obj_names,
+        target_collection_name,
+        count,
+        area,
+        z_start,
+        min_scale,
+        max_scale,
+        use_vgroup,
+        path_threshold,
+        min_distance,
+        use_instances
+    )
 
-        if use_vgroup:
-            w = vgroup_weight_at_face_avg(terrain, no_trees_vgroup, face_index)
-            if w > path_threshold:
-                continue
+def scatter_trees_and_bushes(
+    tree_count,
+    tree_min_scale,
+    tree_max_scale,
+    tree_min_distance,
+    bush_count,
+    bush_min_scale,
+    bush_max_scale,
+    bush_min_distance,
+    area,
+    z_start,
+    use_vgroup,
+    path_threshold,
+    use_instances=False
+):
+    terrain = get_terrain()
+    trees = get_sources([tree_name])
+    bushes = get_sources([bush_name])
 
-        if min_distance > 0.0:
-            loc_vec = Vector(loc)
-            if any((loc_vec - p).length < min_distance for p in placed_positions):
-                continue
-            placed_positions.append(loc_vec)
+    if tree_max_scale < tree_min_scale or bush_max_scale < bush_min_scale:
+        raise RuntimeError("Invalid scale range")
 
-        src = random.choice(sources)
+    terrain_data = prepare_terrain(terrain, use_vgroup)
 
-        new_obj = copy_with_children(src, col)
-        new_obj.location = loc
-        new_obj.rotation_euler[2] = radians(random.uniform(0, 360))
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        tree_job = pool.submit(
+            sample_positions, terrain_data, tree_count, area, z_start,
+            tree_min_scale, tree_max_scale, path_threshold, tree_min_distance, len(trees)
+        )
+        bush_job = pool.submit(
+            sample_positions, terrain_data, bush_count, area, z_start,
+            bush_min_scale, bush_max_scale, path_threshold, bush_min_distance, len(bushes)
+        )
+        tree_samples = tree_job.result()
+        bush_samples = bush_job.result()
 
-        s = random.uniform(min_scale, max_scale)
-        new_obj.scale = (s, s, s)
+    trees_placed, _ = place_objects(trees, tree_collection, tree_samples, use_instances)
+    bushes_placed, _ = place_objects(bushes, bush_collection, bush_samples, use_instances)
 
-        placed += 1
+    bpy.context.view_layer.update()
 
-    return placed, tries
+    return trees_placed, bushes_placed
 
 
 class OBJECT_OT_scatter_trees(bpy.types.Operator):
@@ -227,13 +585,14 @@ class OBJECT_OT_scatter_trees(bpy.types.Operator):
     use_vgroup: bpy.props.BoolProperty(name="Use NoTrees", default=True)
     path_threshold: bpy.props.FloatProperty(name="Threshold", default=0.5, min=0.0, max=1.0)
     min_distance: bpy.props.FloatProperty(name="Min distance", default=1.5, min=0.0)
+    use_instances: bpy.props.BoolProperty(name="Use instances", default=False)
 
     def execute(self, context):
         try:
             placed, tries = scatter_on_terrain(
                 tree_name, tree_collection, self.count, self.area, self.z_start,
                 self.min_scale, self.max_scale, self.use_vgroup,
-                self.path_threshold, self.min_distance
+                self.path_threshold, self.min_distance, self.use_instances
             )
         except Exception as e:
             self.report({"ERROR"}, str(e))
@@ -268,13 +627,14 @@ class OBJECT_OT_scatter_bushes(bpy.types.Operator):
     use_vgroup: bpy.props.BoolProperty(name="Use NoTrees", default=True)
     path_threshold: bpy.props.FloatProperty(name="Threshold", default=0.5, min=0.0, max=1.0)
     min_distance: bpy.props.FloatProperty(name="Min distance", default=1.0, min=0.0)
+    use_instances: bpy.props.BoolProperty(name="Use instances", default=False)
 
     def execute(self, context):
         try:
             placed, tries = scatter_on_terrain(
                 bush_name, bush_collection, self.count, self.area, self.z_start,
                 self.min_scale, self.max_scale, self.use_vgroup,
-                self.path_threshold, self.min_distance
+                self.path_threshold, self.min_distance, self.use_instances
             )
         except Exception as e:
             self.report({"ERROR"}, str(e))
@@ -296,6 +656,42 @@ class OBJECT_OT_clear_bushes(bpy.types.Operator):
         return {"FINISHED"}
 
 
+class OBJECT_OT_scatter_trees_and_bushes(bpy.types.Operator):
+    bl_idname = "object.scatter_trees_and_bushes"
+    bl_label = "Scatter Trees and Bushes"
+    bl_options = {"REGISTER", "UNDO"}
+
+    tree_count: bpy.props.IntProperty(name="Tree count", default=1, min=1, max=500)
+    tree_min_scale: bpy.props.FloatProperty(name="Tree min scale", default=0.7, min=0.01)
+    tree_max_scale: bpy.props.FloatProperty(name="Tree max scale", default=1.2, min=0.01)
+    tree_min_distance: bpy.props.FloatProperty(name="Tree min distance", default=1.5, min=0.0)
+    bush_count: bpy.props.IntProperty(name="Bush count", default=1, min=1, max=500)
+    bush_min_scale: bpy.props.FloatProperty(name="Bush min scale", default=0.4, min=0.01)
+    bush_max_scale: bpy.props.FloatProperty(name="Bush max scale", default=0.8, min=0.01)
+    bush_min_distance: bpy.props.FloatProperty(name="Bush min distance", default=1.0, min=0.0)
+    area: bpy.props.FloatProperty(name="Area", default=10.0, min=0.1)
+    z_start: bpy.props.FloatProperty(name="Ray start Z", default=1000.0)
+    use_vgroup: bpy.props.BoolProperty(name="Use NoTrees", default=True)
+    path_threshold: bpy.props.FloatProperty(name="Threshold", default=0.5, min=0.0, max=1.0)
+    use_instances: bpy.props.BoolProperty(name="Use instances", default=False)
+
+    def execute(self, context):
+        try:
+            trees_placed, bushes_placed = scatter_trees_and_bushes(
+                self.tree_count, self.tree_min_scale, self.tree_max_scale, self.tree_min_distance,
+                self.bush_count, self.bush_min_scale, self.bush_max_scale, self.bush_min_distance,
+                self.area, self.z_start, self.use_vgroup, self.path_threshold, self.use_instances
+            )
+        except Exception as e:
+            self.report({"ERROR"}, str(e))
+            return {"CANCELLED"}
+        self.report({"INFO"}, f"Trees placed: {trees_placed}, bushes placed: {bushes_placed}")
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+
 class OBJECT_OT_scatter_flowers(bpy.types.Operator):
     bl_idname = "object.scatter_flowers"
     bl_label = "Scatter Flowers"
@@ -309,13 +705,14 @@ class OBJECT_OT_scatter_flowers(bpy.types.Operator):
     use_vgroup: bpy.props.BoolProperty(name="Use NoTrees", default=True)
     path_threshold: bpy.props.FloatProperty(name="Threshold", default=0.5, min=0.0, max=1.0)
     min_distance: bpy.props.FloatProperty(name="Min distance", default=0.35, min=0.0)
+    use_instances: bpy.props.BoolProperty(name="Use instances", default=False)
 
     def execute(self, context):
         try:
             placed, tries = scatter_flowers_on_terrain(
                 flower_names, flower_collection, self.count, self.area, self.z_start,
                 self.min_scale, self.max_scale, self.use_vgroup,
-                self.path_threshold, self.min_distance
+                self.path_threshold, self.min_distance, self.use_instances
             )
         except Exception as e:
             self.report({"ERROR"}, str(e))
@@ -342,6 +739,7 @@ classes = (
     OBJECT_OT_clear_trees,
     OBJECT_OT_scatter_bushes,
     OBJECT_OT_clear_bushes,
+    OBJECT_OT_scatter_trees_and_bushes,
     OBJECT_OT_scatter_flowers,
     OBJECT_OT_clear_flowers,
 )
@@ -356,9 +754,23 @@ def unregister():
 
 if __name__ == "__main__":
     register()import bpy
-import random
-from math import radians
-from mathutils import Vector
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from math import tau
+from mathutils import Matrix, Vector
+from mathutils.bvhtree import BVHTree
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+# Blender's Text Editor sets __file__ to "<file>.blend/<text>", where numba cannot cache
+njit_cache = os.path.isfile(__file__)
 
 terrain_name = "Plane"
 no_trees_vgroup = "NoTrees"
@@ -371,6 +783,9 @@ tree_collection = "Generated_Trees"
 bush_collection = "Generated_Bushes"
 flower_collection = "Generated_Flowers"
 
+max_consecutive_fails = 300
+sample_chunk_factor = 4
+
 
 def get_or_create_collection(name):
     col = bpy.data.collections.get(name)
@@ -387,122 +802,422 @@ def get_collection(name):
 def clear_collection(col):
     if col is None:
         return
-    for obj in list(col.objects):
-        bpy.data.objects.remove(obj, do_unlink=True)
+    instance_cols = {obj.instance_collection for obj in col.objects if obj.instance_collection}
+    bpy.data.batch_remove(ids=list(col.objects))
+
+    # drop the <name>_instance collections so the source objects are unlinked from them again
+    for instance_col in instance_cols:
+        if instance_col.users == 0:
+            bpy.data.collections.remove(instance_col)
+
+
+def build_heightfield(mesh, to_local):
+    down = to_local.to_3x3() @ Vector((0.0, 0.0, -1.0))
+    if abs(down.x) > 1e-6 or abs(down.y) > 1e-6 or down.z >= 0.0:
+        return None
+
+    n_verts = len(mesh.vertices)
+    n_polys = len(mesh.polygons)
+    if n_polys == 0:
+        return None
+
+    co = np.empty(n_verts * 3, dtype=np.float64)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3)
+
+    xs = np.unique(np.round(co[:, 0], 5))
+    ys = np.unique(np.round(co[:, 1], 5))
+    nx = len(xs) - 1
+    ny = len(ys) - 1
+    if nx < 1 or ny < 1 or nx * ny != n_polys or (nx + 1) * (ny + 1) != n_verts:
+        return None
+
+    x0 = xs[0]
+    y0 = ys[0]
+    dx = (xs[-1] - x0) / nx
+    dy = (ys[-1] - y0) / ny
+    if not (np.allclose(np.diff(xs), dx) and np.allclose(np.diff(ys), dy)):
+        return None
+
+    vx = np.rint((co[:, 0] - x0) / dx).astype(np.int64)
+    vy = np.rint((co[:, 1] - y0) / dy).astype(np.int64)
+    heights = np.full((ny + 1, nx + 1), np.nan)
+    heights[vy, vx] = co[:, 2]
+    if np.isnan(heights).any():
+        return None
+
+    centers = np.empty(n_polys * 3, dtype=np.float64)
+    mesh.polygons.foreach_get("center", centers)
+    centers = centers.reshape(-1, 3)
+    cx = np.floor((centers[:, 0] - x0) / dx).astype(np.int64)
+    cy = np.floor((centers[:, 1] - y0) / dy).astype(np.int64)
+    if cx.min() < 0 or cy.min() < 0 or cx.max() >= nx or cy.max() >= ny:
+        return None
+
+    cell_to_face = np.full(nx * ny, -1, dtype=np.int64)
+    cell_to_face[cy * nx + cx] = np.arange(n_polys)
+    if (cell_to_face < 0).any():
+        return None
+
+    loop_start = np.empty(n_polys, dtype=np.int32)
+    loop_total = np.empty(n_polys, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", loop_start)
+    mesh.polygons.foreach_get("loop_total", loop_total)
+    if (loop_total != 4).any():
+        return None
+
+    loop_vi = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vi)
+    first = loop_vi[loop_start]
+
+    cell_diag = np.empty(nx * ny, dtype=bool)
+    cell_diag[cy * nx + cx] = (vx[first] - cx) == (vy[first] - cy)
+
+    return x0, y0, dx, dy, nx, ny, heights, cell_to_face, cell_diag
+
+
+def sample_heightfield(heightfield, to_world, to_local, xy, z_start):
+    x0, y0, dx, dy, nx, ny, heights, cell_to_face, cell_diag = heightfield
+
+    m = np.array(to_local)
+    lx = m[0, 0] * xy[:, 0] + m[0, 1] * xy[:, 1] + m[0, 2] * z_start + m[0, 3]
+    ly = m[1, 0] * xy[:, 0] + m[1, 1] * xy[:, 1] + m[1, 2] * z_start + m[1, 3]
+    lz = m[2, 0] * xy[:, 0] + m[2, 1] * xy[:, 1] + m[2, 2] * z_start + m[2, 3]
+
+    gx = (lx - x0) / dx
+    gy = (ly - y0) / dy
+    inside = (gx >= 0.0) & (gy >= 0.0) & (gx <= nx) & (gy <= ny)
+
+    ix = np.clip(gx.astype(np.int64), 0, nx - 1)
+    iy = np.clip(gy.astype(np.int64), 0, ny - 1)
+    fx = gx - ix
+    fy = gy - iy
+
+    z00 = heights[iy, ix]
+    z10 = heights[iy, ix + 1]
+    z01 = heights[iy + 1, ix]
+    z11 = heights[iy + 1, ix + 1]
+
+    z_diag = np.where(
+        fx >= fy,
+        z00 + fx * (z10 - z00) + fy * (z11 - z10),
+        z00 + fy * (z01 - z00) + fx * (z11 - z01)
+    )
+    z_anti = np.where(
+        fx + fy <= 1.0,
+        z00 + fx * (z10 - z00) + fy * (z01 - z00),
+        z11 + (1.0 - fx) * (z01 - z11) + (1.0 - fy) * (z10 - z11)
+    )
+    z = np.where(cell_diag[iy * nx + ix], z_diag, z_anti)
 
+    valid = inside & (z <= lz)
+    face_index = np.where(valid, cell_to_face[iy * nx + ix], -1)
 
-def raycast_to_terrain(terrain, x, y, z_start):
-    depsgraph = bpy.context.evaluated_depsgraph_get()
-    origin = (x, y, z_start)
-    direction = (0.0, 0.0, -1.0)
+    local = np.column_stack((lx, ly, z, np.ones_like(z)))
+    xyz = (local @ np.array(to_world).T)[:, :3]
+    return xyz, face_index
 
-    hit, location, normal, face_index, hit_obj, matrix = bpy.context.scene.ray_cast(
-        depsgraph, origin, direction
-    )
 
-    if hit and hit_obj and hit_obj.name == terrain.name:
-        return location, face_index
+def raycast_to_terrain(bvh, to_world, to_local, direction, x, y, z_start):
+    origin = to_local @ Vector((x, y, z_start))
 
-    return None, None
+    location, normal, face_index, distance = bvh.ray_cast(origin, direction)
 
+    if location is None:
+        return None, None
+
+    return to_world @ location, face_index
+
+
+def vgroup_face_weights_avg(terrain, mesh, vgroup_name):
+    n_polys = len(mesh.polygons)
+    face_weights = np.zeros(n_polys, dtype=np.float32)
 
-def vgroup_weight_at_face_avg(terrain, vgroup_name, face_index):
     vg = terrain.vertex_groups.get(vgroup_name)
-    if vg is None:
-        return 0.0
+    if vg is None or n_polys == 0:
+        return face_weights
 
-    poly = terrain.data.polygons[face_index]
-    weights = []
+    vweight = np.zeros(len(mesh.vertices), dtype=np.float32)
+    for v in mesh.vertices:
+        for g in v.groups:
+            if g.group == vg.index:
+                vweight[v.index] = g.weight
+                break
 
-    for vid in poly.vertices:
-        try:
-            w = vg.weight(vid)
-        except RuntimeError:
-            w = 0.0
-        weights.append(w)
+    loop_start = np.empty(n_polys, dtype=np.int32)
+    loop_total = np.empty(n_polys, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", loop_start)
+    mesh.polygons.foreach_get("loop_total", loop_total)
 
-    return sum(weights) / len(weights) if weights else 0.0
+    loop_vi = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vi)
 
+    face_weights[:] = np.add.reduceat(vweight[loop_vi], loop_start) / loop_total
+    return face_weights
 
-def copy_with_children(src_obj, target_collection):
-    new_obj = src_obj.copy()
-    target_collection.objects.link(new_obj)
 
-    for child in src_obj.children:
-        new_child = copy_with_children(child, target_collection)
-        new_child.parent = new_obj
-        new_child.matrix_parent_inverse = child.matrix_parent_inverse.copy()
-        new_child.matrix_basis = child.matrix_basis.copy()
+def terrain_hits(bvh, heightfield, to_world, to_local, xy, z_start):
+    if heightfield is not None:
+        return sample_heightfield(heightfield, to_world, to_local, xy, z_start)
 
-    return new_obj
+    xyz = np.zeros((len(xy), 3))
+    face_index = np.full(len(xy), -1, dtype=np.int64)
 
+    raycast = raycast_to_terrain
+    direction = to_local.to_3x3() @ Vector((0.0, 0.0, -1.0))
 
-def scatter_on_terrain(
-    source_obj_name,
-    target_collection_name,
-    count,
+    for i, (x, y) in enumerate(xy.tolist()):
+        loc, face = raycast(bvh, to_world, to_local, direction, x, y, z_start)
+        if loc is not None:
+            xyz[i] = loc
+            face_index[i] = face
+
+    return xyz, face_index
+
+
+@njit(cache=njit_cache, nogil=True)
+def poisson_sample(
+    xyz,
+    valid,
+    offset,
     area,
-    z_start,
-    min_scale,
-    max_scale,
-    use_vgroup,
-    path_threshold,
-    min_distance
+    cell,
+    nx,
+    min_distance,
+    max_fails,
+    head,
+    next_in_cell,
+    placed_xyz,
+    accepted,
+    counters
 ):
+    count = placed_xyz.shape[0]
+    placed = counters[0]
+    fails_since_accept = counters[1]
+    min_distance_sq = min_distance * min_distance
+    used = 0
+
+    for t in range(xyz.shape[0]):
+        if placed >= count or fails_since_accept >= max_fails:
+            break
+        used = t + 1
+
+        if not valid[t]:
+            continue
+
+        x = xyz[t, 0]
+        y = xyz[t, 1]
+        z = xyz[t, 2]
+        ix = min(max(int((x + area) / cell), 0), nx - 1)
+        iy = min(max(int((y + area) / cell), 0), nx - 1)
+
+        if min_distance > 0.0:
+            too_close = False
+            for gy in range(max(iy - 1, 0), min(iy + 2, nx)):
+                for gx in range(max(ix - 1, 0), min(ix + 2, nx)):
+                    j = head[gy * nx + gx]
+                    while j >= 0:
+                        dx = x - placed_xyz[j, 0]
+                        dy = y - placed_xyz[j, 1]
+                        dz = z - placed_xyz[j, 2]
+                        if dx * dx + dy * dy + dz * dz < min_distance_sq:
+                            too_close = True
+                            break
+                        j = next_in_cell[j]
+                    if too_close:
+                        break
+                if too_close:
+                    break
+            if too_close:
+                fails_since_accept += 1
+                continue
+
+            c = iy * nx + ix
+            next_in_cell[placed] = head[c]
+            head[c] = placed
+
+        placed_xyz[placed, 0] = x
+        placed_xyz[placed, 1] = y
+        placed_xyz[placed, 2] = z
+        accepted[placed] = offset + t
+        placed += 1
+        fails_since_accept = 0
+
+    counters[0] = placed
+    counters[1] = fails_since_accept
+    return used
+
+
+def copy_with_children(src_obj, target_collection):
+    mapping = {}
+    stack = [src_obj]
+
+    while stack:
+        obj = stack.pop()
+        new_obj = obj.copy()
+        target_collection.objects.link(new_obj)
+        mapping[obj] = new_obj
+        stack.extend(obj.children)
+
+    for obj, new_obj in mapping.items():
+        if obj is src_obj:
+            continue
+        new_obj.parent = mapping[obj.parent]
+        new_obj.matrix_parent_inverse = obj.matrix_parent_inverse
+        new_obj.matrix_basis = obj.matrix_basis
+
+    return mapping[src_obj]
+
+
+def get_instance_collection(src_obj):
+    name = f"{src_obj.name}_instance"
+    col = bpy.data.collections.get(name)
+    if col is None:
+        col = bpy.data.collections.new(name)
+
+    for obj in [src_obj, *src_obj.children_recursive]:
+        if col.objects.get(obj.name) is None:
+            col.objects.link(obj)
+
+    col.instance_offset = src_obj.matrix_world.translation
+    return col
+
+
+def create_instance(instance_col, target_collection):
+    empty = bpy.data.objects.new(instance_col.name, None)
+    empty.instance_type = "COLLECTION"
+    empty.instance_collection = instance_col
+    target_collection.objects.link(empty)
+    return empty
+
+
+def get_terrain():
     terrain = bpy.data.objects.get(terrain_name)
-    src = bpy.data.objects.get(source_obj_name)
 
     if terrain is None:
         raise RuntimeError("Terrain not found")
     if terrain.type != "MESH":
         raise RuntimeError("Terrain must be mesh")
-    if src is None:
-        raise RuntimeError(f"Source object '{source_obj_name}' not found")
-    if max_scale < min_scale:
-        raise RuntimeError("Invalid scale range")
 
-    col = get_or_create_collection(target_collection_name)
-    clear_collection(col)
+    return terrain
 
-    placed_positions = []
-    placed = 0
-    tries = 0
-    max_tries = count * 40
 
-    while placed < count and tries < max_tries:
-        tries += 1
+def prepare_terrain(terrain, use_vgroup):
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    to_world = terrain.matrix_world.copy()
+    to_local = to_world.inverted()
 
-        x = random.uniform(-area, area)
-        y = random.uniform(-area, area)
-
-        loc, face_index = raycast_to_terrain(terrain, x, y, z_start)
-        if loc is None:
-            continue
+    eval_obj = terrain.evaluated_get(depsgraph)
+    eval_mesh = eval_obj.to_mesh()
+    try:
+        heightfield = build_heightfield(eval_mesh, to_local)
 
+        face_weights = None
         if use_vgroup:
-            w = vgroup_weight_at_face_avg(terrain, no_trees_vgroup, face_index)
-            if w > path_threshold:
-                continue
+            face_weights = vgroup_face_weights_avg(terrain, eval_mesh, no_trees_vgroup)
+    finally:
+        eval_obj.to_mesh_clear()
 
-        if min_distance > 0.0:
-            loc_vec = Vector(loc)
-            if any((loc_vec - p).length < min_distance for p in placed_positions):
-                continue
-            placed_positions.append(loc_vec)
+    # the heightfield answers every lookup, only irregular terrains need the BVH
+    bvh = None
+    if heightfield is None:
+        bvh = BVHTree.FromObject(terrain, depsgraph)
 
-        new_obj = copy_with_children(src, col)
-        new_obj.location = loc
-        new_obj.rotation_euler[2] = radians(random.uniform(0, 360))
+    return bvh, heightfield, to_world, to_local, face_weights
 
-        s = random.uniform(min_scale, max_scale)
-        new_obj.scale = (s, s, s)
 
-        placed += 1
+def get_sources(source_obj_names):
+    sources = []
+    for name in source_obj_names:
+        obj = bpy.data.objects.get(name)
+        if obj is None:
+            raise RuntimeError(f"Source object '{name}' not found")
+        sources.append(obj)
+    return sources
 
-    return placed, tries
 
+def sample_positions(
+    terrain_data,
+    count,
+    area,
+    z_start,
+    min_scale,
+    max_scale,
+    path_threshold,
+    min_distance,
+    n_sources
+):
+    bvh, heightfield, to_world, to_local, face_weights = terrain_data
+    max_tries = count * 40
+    chunk_size = count * sample_chunk_factor
+
+    rng = np.random.default_rng()
+    xy = rng.uniform(-area, area, (max_tries, 2))
+    rots = rng.uniform(0.0, tau, max_tries)
+    scales = rng.uniform(min_scale, max_scale, max_tries)
+    choices = rng.integers(n_sources, size=max_tries)
+
+    cell = max(min_distance, 2.0 * area / 256.0)
+    nx = int(2.0 * area / cell) + 1
+    head = np.full(nx * nx, -1, dtype=np.int64)
+    next_in_cell = np.full(count, -1, dtype=np.int64)
+    placed_xyz = np.empty((count, 3))
+    accepted = np.empty(count, dtype=np.int64)
+    counters = np.zeros(2, dtype=np.int64)
+    tries = 0
+
+    for start in range(0, max_tries, chunk_size):
+        xyz, face_index = terrain_hits(
+            bvh, heightfield, to_world, to_local, xy[start:start + chunk_size], z_start
+        )
+        valid = face_index >= 0
+        if face_weights is not None and len(face_weights):
+            valid &= face_weights[np.maximum(face_index, 0)] <= path_threshold
 
-def scatter_flowers_on_terrain(
+        tries = start + poisson_sample(
+            xyz, valid, start, area, cell, nx, min_distance, max_consecutive_fails,
+            head, next_in_cell, placed_xyz, accepted, counters
+        )
+        if counters[0] >= count or counters[1] >= max_consecutive_fails:
+            break
+
+    placed = counters[0]
+    accepted = accepted[:placed]
+    return placed_xyz[:placed], rots[accepted], scales[accepted], choices[accepted], tries
+
+
+def place_objects(sources, target_collection_name, samples, use_instances):
+    locs, rots, scales, choices, tries = samples
+
+    col = get_or_create_collection(target_collection_name)
+    clear_collection(col)
+
+    if use_instances:
+        instance_cols = {obj: get_instance_collection(obj) for obj in sources}
+        # the instance draws the source with its own transform, cancel it out so
+        # the root ends up where copy mode would put it
+        instance_corr = {
+            obj: obj.matrix_world.inverted() @ Matrix.Translation(instance_cols[obj].instance_offset)
+            for obj in sources
+        }
+
+    for loc, rot_z, s, k in zip(locs.tolist(), rots.tolist(), scales.tolist(), choices.tolist()):
+        src = sources[k]
+        if use_instances:
+            new_obj = create_instance(instance_cols[src], col)
+            rot = src.rotation_euler.copy()
+            rot[2] = rot_z
+            new_obj.matrix_world = Matrix.LocRotScale(loc, rot, (s, s, s)) @ instance_corr[src]
+        else:
+            new_obj = copy_with_children(src, col)
+            new_obj.location = loc
+            new_obj.rotation_euler[2] = rot_z
+            new_obj.scale = (s, s, s)
+
+    return len(locs), tries
+
+
+def scatter_sources_on_terrain(
     source_obj_names,
     target_collection_name,
     count,
@@ -512,65 +1227,125 @@ def scatter_flowers_on_terrain(
     max_scale,
     use_vgroup,
     path_threshold,
-    min_distance
+    min_distance,
+    use_instances=False
 ):
-    terrain = bpy.data.objects.get(terrain_name)
+    terrain = get_terrain()
+    sources = get_sources(source_obj_names)
 
-    if terrain is None:
-        raise RuntimeError("Terrain not found")
-    if terrain.type != "MESH":
-        raise RuntimeError("Terrain must be mesh")
     if max_scale < min_scale:
         raise RuntimeError("Invalid scale range")
 
-    sources = []
-    for name in source_obj_names:
-        obj = bpy.data.objects.get(name)
-        if obj is None:
-            raise RuntimeError(f"Source object '{name}' not found")
-        sources.append(obj)
+    terrain_data = prepare_terrain(terrain, use_vgroup)
+    samples = sample_positions(
+        terrain_data, count, area, z_start, min_scale, max_scale,
+        path_threshold, min_distance, len(sources)
+    )
+    placed, tries = place_objects(sources, target_collection_name, samples, use_instances)
 
-    col = get_or_create_collection(target_collection_name)
-    clear_collection(col)
+    bpy.context.view_layer.update()
 
-    placed_positions = []
-    placed = 0
-    tries = 0
-    max_tries = count * 40
+    return placed, tries
 
-    while placed < count and tries < max_tries:
-        tries += 1
 
-        x = random.uniform(-area, area)
-        y = random.uniform(-area, area)
+def scatter_on_terrain(
+    source_obj_name,
+    target_collection_name,
+    count,
+    area,
+    z_start,
+    min_scale,
+    max_scale,
+    use_vgroup,
+    path_threshold,
+    min_distance,
+    use_instances=False
+):
+    return scatter_sources_on_terrain(
+        [source_obj_name],
+        target_collection_name,
+        count,
+        area,
+        z_start,
+        min_scale,
+        max_scale,
+        use_vgroup,
+        path_threshold,
+        min_distance,
+        use_instances
+    )
 
-        loc, face_index = raycast_to_terrain(terrain, x, y, z_start)
-        if loc is None:
-            continue
 
-        if use_vgroup:
-            w = vgroup_weight_at_face_avg(terrain, no_trees_vgroup, face_index)
-            if w > path_threshold:
-                continue
+def scatter_flowers_on_terrain(
+    source_obj_names,
+    target_collection_name,
+    count,
+    area,
+    z_start,
+    min_scale,
+    max_scale,
+    use_vgroup,
+    path_threshold,
+    min_distance,
+    use_instances=False
+):
+    return scatter_sources_on_terrain(
+        source_obj_names,
+        target_collection_name,
+        count,
+        area,
+        z_start,
+        min_scale,
+        max_scale,
+        use_vgroup,
+        path_threshold,
+        min_distance,
+        use_instances
+    )
 
-        if min_distance > 0.0:
-            loc_vec = Vector(loc)
-            if any((loc_vec - p).length < min_distance for p in placed_positions):
-                continue
-            placed_positions.append(loc_vec)
 
-        src = random.choice(sources)
+def scatter_trees_and_bushes(
+    tree_count,
+    tree_min_scale,
+    tree_max_scale,
+    tree_min_distance,
+    bush_count,
+    bush_min_scale,
+    bush_max_scale,
+    bush_min_distance,
+    area,
+    z_start,
+    use_vgroup,
+    path_threshold,
+    use_instances=False
+):
+    terrain = get_terrain()
+    trees = get_sources([tree_name])
+    bushes = get_sources([bush_name])
 
-        new_obj = copy_with_children(src, col)
-        new_obj.location = loc
-        new_obj.rotation_euler[2] = radians(random.uniform(0, 360))
+    if tree_max_scale < tree_min_scale or bush_max_scale < bush_min_scale:
+        raise RuntimeError("Invalid scale range")
 
-        s = random.uniform(min_scale, max_scale)
-        new_obj.scale = (s, s, s)
+    terrain_data = prepare_terrain(terrain, use_vgroup)
 
-        placed += 1
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        tree_job = pool.submit(
+            sample_positions, terrain_data, tree_count, area, z_start,
+            tree_min_scale, tree_max_scale, path_threshold, tree_min_distance, len(trees)
+        )
+        bush_job = pool.submit(
+            sample_positions, terrain_data, bush_count, area, z_start,
+            bush_min_scale, bush_max_scale, path_threshold, bush_min_distance, len(bushes)
+        )
+        tree_samples = tree_job.result()
+        bush_samples = bush_job.result()
 
-    return placed, tries
+    trees_placed, _ = place_objects(trees, tree_collection, tree_samples, use_instances)
+    bushes_placed, _ = place_objects(bushes, bush_collection, bush_samples, use_instances)
+
+    bpy.context.view_layer.update()
+
+    return trees_placed, bushes_placed
 
 
 class OBJECT_OT_scatter_trees(bpy.types.Operator):
@@ -590,6 +1365,8 @@ class OBJECT_OT_scatter_trees(bpy.types.Operator):
 
     min_distance: bpy.props.FloatProperty(name="Min distance", default=1.5, min=0.0)
 
+    use_instances: bpy.props.BoolProperty(name="Use instances", default=False)
+
     def execute(self, context):
         try:
             placed, tries = scatter_on_terrain(
@@ -602,7 +1379,8 @@ class OBJECT_OT_scatter_trees(bpy.types.Operator):
                 self.max_scale,
                 self.use_vgroup,
                 self.path_threshold,
-                self.min_distance
+                self.min_distance,
+                self.use_instances
             )
         except Exception as e:
             self.report({"ERROR"}, str(e))
@@ -642,6 +1420,8 @@ class OBJECT_OT_scatter_bushes(bpy.types.Operator):
 
     min_distance: bpy.props.FloatProperty(name="Min distance", default=1.0, min=0.0)
 
+    use_instances: bpy.props.BoolProperty(name="Use instances", default=False)
+
     def execute(self, context):
         try:
             placed, tries = scatter_on_terrain(
@@ -654,7 +1434,8 @@ class OBJECT_OT_scatter_bushes(bpy.types.Operator):
                 self.max_scale,
                 self.use_vgroup,
                 self.path_threshold,
-                self.min_distance
+                self.min_distance,
+                self.use_instances
             )
         except Exception as e:
             self.report({"ERROR"}, str(e))
@@ -677,6 +1458,57 @@ class OBJECT_OT_clear_bushes(bpy.types.Operator):
         return {"FINISHED"}
 
 
+class OBJECT_OT_scatter_trees_and_bushes(bpy.types.Operator):
+    bl_idname = "object.scatter_trees_and_bushes"
+    bl_label = "Scatter Trees and Bushes"
+    bl_options = {"REGISTER", "UNDO"}
+
+    tree_count: bpy.props.IntProperty(name="Tree count", default=40, min=1, max=5000)
+    tree_min_scale: bpy.props.FloatProperty(name="Tree min scale", default=0.7, min=0.01)
+    tree_max_scale: bpy.props.FloatProperty(name="Tree max scale", default=1.2, min=0.01)
+    tree_min_distance: bpy.props.FloatProperty(name="Tree min distance", default=1.5, min=0.0)
+
+    bush_count: bpy.props.IntProperty(name="Bush count", default=20, min=1, max=5000)
+    bush_min_scale: bpy.props.FloatProperty(name="Bush min scale", default=0.4, min=0.01)
+    bush_max_scale: bpy.props.FloatProperty(name="Bush max scale", default=0.8, min=0.01)
+    bush_min_distance: bpy.props.FloatProperty(name="Bush min distance", default=1.0, min=0.0)
+
+    area: bpy.props.FloatProperty(name="Area", default=6.0, min=0.1)
+    z_start: bpy.props.FloatProperty(name="Ray start Z", default=1000.0)
+
+    use_vgroup: bpy.props.BoolProperty(name="Use NoTrees", default=True)
+    path_threshold: bpy.props.FloatProperty(name="Threshold", default=0.5, min=0.0, max=1.0)
+
+    use_instances: bpy.props.BoolProperty(name="Use instances", default=False)
+
+    def execute(self, context):
+        try:
+            trees_placed, bushes_placed = scatter_trees_and_bushes(
+                self.tree_count,
+                self.tree_min_scale,
+                self.tree_max_scale,
+                self.tree_min_distance,
+                self.bush_count,
+                self.bush_min_scale,
+                self.bush_max_scale,
+                self.bush_min_distance,
+                self.area,
+                self.z_start,
+                self.use_vgroup,
+                self.path_threshold,
+                self.use_instances
+            )
+        except Exception as e:
+            self.report({"ERROR"}, str(e))
+            return {"CANCELLED"}
+
+        self.report({"INFO"}, f"Trees placed: {trees_placed}, bushes placed: {bushes_placed}")
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+
 class OBJECT_OT_scatter_flowers(bpy.types.Operator):
     bl_idname = "object.scatter_flowers"
     bl_label = "Scatter Flowers"
@@ -694,6 +1526,8 @@ class OBJECT_OT_scatter_flowers(bpy.types.Operator):
 
     min_distance: bpy.props.FloatProperty(name="Min distance", default=0.35, min=0.0)
 
+    use_instances: bpy.props.BoolProperty(name="Use instances", default=False)
+
     def execute(self, context):
         try:
             placed, tries = scatter_flowers_on_terrain(
@@ -706,7 +1540,8 @@ class OBJECT_OT_scatter_flowers(bpy.types.Operator):
                 self.max_scale,
                 self.use_vgroup,
                 self.path_threshold,
-                self.min_distance
+                self.min_distance,
+                self.use_instances
             )
         except Exception as e:
             self.report({"ERROR"}, str(e))
@@ -734,6 +1569,7 @@ classes = (
     OBJECT_OT_clear_trees,
     OBJECT_OT_scatter_bushes,
     OBJECT_OT_clear_bushes,
+    OBJECT_OT_scatter_trees_and_bushes,
     OBJECT_OT_scatter_flowers,
     OBJECT_OT_clear_flowers,
 )
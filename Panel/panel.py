@@ -253,6 +253,8 @@ class FOREST_PT_panel(bpy.types.Panel):
         row.operator("object.scatter_bushes", icon="OUTLINER_OB_GROUP_INSTANCE")
         row.operator("object.clear_bushes", icon="TRASH")
 
+        box_scatter.operator("object.scatter_trees_and_bushes", icon="OUTLINER_OB_GROUP_INSTANCE")
+
         row = box_scatter.row(align=True)
         row.operator("object.scatter_flowers", icon="OUTLINER_OB_GROUP_INSTANCE")
         row.operator("object.clear_flowers", icon="TRASH")